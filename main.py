@@ -1,28 +1,181 @@
+import asyncio
+import logging
 import os
-from typing import List, Optional
-from fastapi import FastAPI, HTTPException
+import time
+from contextlib import asynccontextmanager
+from math import fsum
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple, Type, TypeVar
+import orjson
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+from pymongo.errors import DuplicateKeyError, PyMongoError, ServerSelectionTimeoutError
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
-from database import db, create_document, get_documents
+from database import db, create_document, create_documents, get_documents
 from schemas import Product as ProductSchema, BlogPost as BlogPostSchema, Consultation as ConsultationSchema, Order as OrderSchema
+from schemas import ProductOut, BlogPostOut, BlogPostSummaryOut, ConsultationOut, ConsultationPage, OrderOut, OrderPage
 
-app = FastAPI(title="E-commerce + Blog + Consultation API")
+logger = logging.getLogger(__name__)
+
+M = TypeVar("M", bound=BaseModel)
+
+# Environment is fixed for the process lifetime (database has already loaded .env)
+HAS_DB_URL = bool(os.getenv("DATABASE_URL"))
+HAS_DB_NAME = bool(os.getenv("DATABASE_NAME"))
+
+# Bind collection handles once instead of building them per request
+if db is not None:
+    PRODUCT_COL, BLOG_COL, CONSULT_COL, ORDER_COL = db["product"], db["blogpost"], db["consultation"], db["order"]
+else:
+    PRODUCT_COL = BLOG_COL = CONSULT_COL = ORDER_COL = None
+
+# Optional Redis read-through cache for rarely-changing catalog/blog data
+cache = Redis.from_url(os.getenv("REDIS_URL")) if os.getenv("REDIS_URL") else None
+CACHE_TTL = 300
+PRODUCTS_CACHE_KEY = "products:list:v1"
+BLOGS_CACHE_KEY = "blogs:list:v2"
+
+async def cache_get(key: str) -> Optional[bytes]:
+    """Return cached payload, treating any Redis failure as a miss"""
+    if cache is None:
+        return None
+    try:
+        return await cache.get(key)
+    except RedisError:
+        return None
+
+async def cache_set(key: str, payload: bytes) -> None:
+    if cache is None:
+        return
+    try:
+        await cache.setex(key, CACHE_TTL, payload)
+    except RedisError:
+        pass
+
+async def cache_delete(*keys: str) -> None:
+    if cache is None:
+        return
+    try:
+        await cache.delete(*keys)
+    except RedisError:
+        pass
+
+def json_response(payload: bytes) -> Response:
+    return Response(content=payload, media_type="application/json")
+
+async def cached_json(key: str, build: Callable[[], Awaitable[bytes]]) -> Response:
+    """Serve pre-serialized JSON from Redis, building and storing it on a miss"""
+    payload = await cache_get(key)
+    if payload is None:
+        payload = await build()
+        await cache_set(key, payload)
+    return json_response(payload)
+
+# Prebuilt pydantic-core serializers for the document-returning endpoints
+PRODUCT_LIST_ADAPTER = TypeAdapter(List[ProductOut])
+BLOG_LIST_ADAPTER = TypeAdapter(List[BlogPostSummaryOut])
+BLOG_ADAPTER = TypeAdapter(BlogPostOut)
+CONSULTATION_LIST_ADAPTER = TypeAdapter(List[ConsultationOut])
+ORDER_LIST_ADAPTER = TypeAdapter(List[OrderOut])
+
+def from_stored(model: Type[M], doc: dict) -> M:
+    """Wrap a stored document for output without re-validating it"""
+    fields = {k: v for k, v in doc.items() if k != "_id"}
+    return model.model_construct(id=str(doc["_id"]), **fields)
+
+def items_json(adapter: TypeAdapter, model: Type[BaseModel], docs: List[dict], **extra: Any) -> bytes:
+    """Encode {"items": [...], **extra} through a prebuilt list adapter"""
+    # Stored data is served as-is: only fields the document has, no type warnings
+    items = adapter.dump_json([from_stored(model, d) for d in docs], exclude_unset=True, warnings=False)
+    body = b'{"items":' + items
+    for key, value in extra.items():
+        body += b',' + orjson.dumps(key) + b':' + orjson.dumps(value)
+    return body + b'}'
+
+# Keyset pagination: newest first, resuming below the last _id seen
+NEWEST_FIRST = [("_id", -1)]
+
+def page_filter(cursor: Optional[str]) -> dict:
+    if cursor is None:
+        return {}
+    try:
+        return {"_id": {"$lt": ObjectId(cursor)}}
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def next_cursor(docs: List[dict], limit: int) -> Optional[str]:
+    """Cursor for the following page, or None when this page is the last"""
+    return str(docs[-1]["_id"]) if limit and len(docs) == limit else None
+
+async def ensure_indexes():
+    if db is None:
+        return
+    # Let Mongo enforce uniqueness instead of pre-checking in handlers
+    indexes = [
+        (BLOG_COL, "slug", {"unique": True}),
+        (PRODUCT_COL, "sku", {"unique": True, "partialFilterExpression": {"sku": {"$type": "string"}}}),
+        (CONSULT_COL, "email", {}),
+    ]
+    for collection, key, options in indexes:
+        # An unreachable server or pre-existing duplicates must not stop the app
+        # from booting; /test reports database problems
+        try:
+            await collection.create_index(key, **options)
+        except ServerSelectionTimeoutError as e:
+            logger.warning("Skipping index creation, database unreachable: %s", e)
+            return
+        except PyMongoError as e:
+            logger.warning("Could not create index on %s.%s: %s", collection.name, key, e)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build indexes in the background so startup never waits on the database
+    indexing = asyncio.create_task(ensure_indexes())
+    yield
+    indexing.cancel()
+
+app = FastAPI(title="E-commerce + Blog + Consultation API", default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# Comma-separated list of allowed frontend origins; "*" keeps the old open policy
+FRONTEND_ORIGINS = [o.strip() for o in os.getenv("FRONTEND_URL", "*").split(",") if o.strip()]
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=FRONTEND_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["content-type", "authorization"],
 )
 
+# Static payloads are encoded once; a fresh Response is still built per call
+# because middleware (CORS) appends headers to the response it is given
+ROOT_PAYLOAD = orjson.dumps({"message": "Backend running", "services": ["products", "blogs", "consultations", "checkout"]})
+
 @app.get("/")
-def read_root():
-    return {"message": "Backend running", "services": ["products", "blogs", "consultations", "checkout"]}
+async def read_root():
+    return json_response(ROOT_PAYLOAD)
+
+# listCollections is an admin command; probes reuse the result for a few seconds
+COLLECTIONS_TTL = 10.0
+_collections_cache: Tuple[List[str], float] = ([], float("-inf"))
+
+async def list_collection_names_cached() -> List[str]:
+    global _collections_cache
+    names, fetched_at = _collections_cache
+    if time.monotonic() - fetched_at < COLLECTIONS_TTL:
+        return names
+    names = await db.list_collection_names()
+    _collections_cache = (names, time.monotonic())
+    return names
 
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -34,11 +187,11 @@ def test_database():
     try:
         if db is not None:
             response["database"] = "✅ Available"
-            response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
+            response["database_url"] = "✅ Set" if HAS_DB_URL else "❌ Not Set"
             response["database_name"] = db.name if hasattr(db, 'name') else "✅ Connected"
             response["connection_status"] = "Connected"
             try:
-                collections = db.list_collection_names()
+                collections = await list_collection_names_cached()
                 response["collections"] = collections[:10]
                 response["database"] = "✅ Connected & Working"
             except Exception as e:
@@ -48,8 +201,8 @@ def test_database():
     except Exception as e:
         response["database"] = f"❌ Error: {str(e)[:50]}"
 
-    response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
-    response["database_name"] = "✅ Set" if os.getenv("DATABASE_NAME") else "❌ Not Set"
+    response["database_url"] = "✅ Set" if HAS_DB_URL else "❌ Not Set"
+    response["database_name"] = "✅ Set" if HAS_DB_NAME else "❌ Not Set"
     return response
 
 # ---------------- Products ----------------
@@ -57,41 +210,46 @@ def test_database():
 class SeedRequest(BaseModel):
     force: bool = False
 
-SAMPLE_PRODUCTS: List[dict] = [
-    {
-        "title": f"Product {i+1}",
+SAMPLE_PRODUCT_COUNT = 10
+
+# Per-field columns are built first and zipped into documents once
+_sample_ids = range(SAMPLE_PRODUCT_COUNT)
+_sample_titles = [f"Product {i+1}" for i in _sample_ids]
+_sample_prices = [499.0 + 50.0 * i for i in _sample_ids]
+_sample_images = [f"https://picsum.photos/seed/p{i}/600/400" for i in _sample_ids]
+_sample_skus = [f"SKU{i+1:03}" for i in _sample_ids]
+
+# Read-only template; create_documents materializes fresh dicts on insert
+SAMPLE_PRODUCTS: Tuple[Mapping[str, Any], ...] = tuple(
+    MappingProxyType({
+        "title": title,
         "description": "A great product you will love.",
-        "price": float(499 + i * 50),
+        "price": price,
         "category": "general",
         "in_stock": True,
-        "image": f"https://picsum.photos/seed/p{i}/600/400",
-        "sku": f"SKU{i+1:03}",
+        "image": image,
+        "sku": sku,
         "stock_qty": 20
-    }
-    for i in range(10)
-]
+    })
+    for title, price, image, sku in zip(_sample_titles, _sample_prices, _sample_images, _sample_skus)
+)
 
 @app.post("/api/products/seed")
-def seed_products(body: SeedRequest):
-    existing = db["product"].count_documents({}) if db else 0
+async def seed_products(body: SeedRequest):
+    existing = await PRODUCT_COL.count_documents({}) if PRODUCT_COL is not None else 0
     if existing > 0 and not body.force:
         return {"inserted": 0, "message": "Products already exist"}
     if body.force:
-        db["product"].delete_many({})
-    inserted = 0
-    for p in SAMPLE_PRODUCTS:
-        create_document("product", p)
-        inserted += 1
-    return {"inserted": inserted}
-
-@app.get("/api/products")
-def list_products():
-    docs = get_documents("product")
-    # Convert ObjectId to str if present
-    for d in docs:
-        if "_id" in d:
-            d["id"] = str(d.pop("_id"))
-    return {"items": docs}
+        await PRODUCT_COL.delete_many({})
+    inserted = await create_documents("product", SAMPLE_PRODUCTS)
+    await cache_delete(PRODUCTS_CACHE_KEY)
+    return {"inserted": len(inserted)}
+
+@app.get("/api/products", response_model=Dict[str, List[ProductOut]])
+async def list_products():
+    async def build() -> bytes:
+        return items_json(PRODUCT_LIST_ADAPTER, ProductOut, await get_documents("product"))
+    return await cached_json(PRODUCTS_CACHE_KEY, build)
 
 # ---------------- Blogs ----------------
 
@@ -103,30 +261,33 @@ class BlogCreate(BaseModel):
     cover_image: Optional[str] = None
     author: Optional[str] = None
 
-@app.get("/api/blogs")
-def list_blogs():
-    docs = get_documents("blogpost")
-    for d in docs:
-        if "_id" in d:
-            d["id"] = str(d.pop("_id"))
-    return {"items": docs}
+# Listing cards never render the post body, so leave content in Mongo
+BLOG_SUMMARY_PROJECTION = {"title": 1, "slug": 1, "excerpt": 1, "cover_image": 1, "author": 1}
+
+@app.get("/api/blogs", response_model=Dict[str, List[BlogPostSummaryOut]])
+async def list_blogs():
+    async def build() -> bytes:
+        return items_json(BLOG_LIST_ADAPTER, BlogPostSummaryOut, await get_documents("blogpost", projection=BLOG_SUMMARY_PROJECTION))
+    return await cached_json(BLOGS_CACHE_KEY, build)
 
 @app.post("/api/blogs")
-def create_blog(blog: BlogCreate):
-    # Prevent duplicate slug
-    exists = db["blogpost"].find_one({"slug": blog.slug})
-    if exists:
+async def create_blog(blog: BlogCreate):
+    # Duplicate slugs are rejected by the unique index on blogpost.slug
+    try:
+        bid = await create_document("blogpost", blog.model_dump())
+    except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="Slug already exists")
-    bid = create_document("blogpost", blog.model_dump())
+    await cache_delete(BLOGS_CACHE_KEY, f"blog:{blog.slug}")
     return {"id": bid}
 
-@app.get("/api/blogs/{slug}")
-def get_blog(slug: str):
-    doc = db["blogpost"].find_one({"slug": slug})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Not found")
-    doc["id"] = str(doc.pop("_id"))
-    return doc
+@app.get("/api/blogs/{slug}", response_model=BlogPostOut)
+async def get_blog(slug: str):
+    async def build() -> bytes:
+        doc = await BLOG_COL.find_one({"slug": slug})
+        if not doc:
+            raise HTTPException(status_code=404, detail="Not found")
+        return BLOG_ADAPTER.dump_json(from_stored(BlogPostOut, doc), exclude_unset=True, warnings=False)
+    return await cached_json(f"blog:{slug}", build)
 
 # ---------------- Consultations ----------------
 
@@ -140,17 +301,14 @@ class ConsultationRequest(BaseModel):
     notes: Optional[str] = None
 
 @app.post("/api/consultations")
-def book_consultation(req: ConsultationRequest):
-    cid = create_document("consultation", req.model_dump())
+async def book_consultation(req: ConsultationRequest):
+    cid = await create_document("consultation", req.model_dump())
     return {"id": cid, "status": "pending"}
 
-@app.get("/api/consultations")
-def list_consultations(limit: int = 20):
-    docs = get_documents("consultation", {}, limit)
-    for d in docs:
-        if "_id" in d:
-            d["id"] = str(d.pop("_id"))
-    return {"items": docs}
+@app.get("/api/consultations", response_model=ConsultationPage)
+async def list_consultations(limit: int = 20, cursor: Optional[str] = None):
+    docs = await get_documents("consultation", page_filter(cursor), limit, sort=NEWEST_FIRST)
+    return json_response(items_json(CONSULTATION_LIST_ADAPTER, ConsultationOut, docs, next_cursor=next_cursor(docs, limit)))
 
 # ---------------- Checkout / Orders ----------------
 
@@ -167,17 +325,19 @@ class CreateOrderRequest(BaseModel):
     customer_email: str
     customer_address: str
 
+ORDER_ITEMS_ADAPTER = TypeAdapter(List[OrderItemIn])
+
 @app.post("/api/checkout/create-order")
-def create_order(req: CreateOrderRequest):
+async def create_order(req: CreateOrderRequest):
     if not req.items:
         raise HTTPException(status_code=400, detail="Cart is empty")
-    subtotal = sum(i.price * i.quantity for i in req.items)
+    subtotal = fsum(i.price * i.quantity for i in req.items)
     tax = round(subtotal * 0.18, 2)  # 18% GST example
     shipping = 49.0 if subtotal < 999 else 0.0
     total = round(subtotal + tax + shipping, 2)
 
     order_doc = {
-        "items": [i.model_dump() for i in req.items],
+        "items": ORDER_ITEMS_ADAPTER.dump_python(req.items),
         "subtotal": subtotal,
         "tax": tax,
         "shipping": shipping,
@@ -189,7 +349,7 @@ def create_order(req: CreateOrderRequest):
         "payment_status": "pending",
         "payment_provider": "mock"
     }
-    oid = create_document("order", order_doc)
+    oid = await create_document("order", order_doc)
 
     # Mock payment URL (would be Razorpay/Stripe in real app)
     payment_url = f"/api/checkout/confirm?order_id={oid}&status=paid"
@@ -199,40 +359,46 @@ class ConfirmRequest(BaseModel):
     order_id: str
     status: str  # "paid" | "failed"
 
+async def set_payment_status(oid: ObjectId, new_status: str) -> None:
+    await ORDER_COL.update_one({"_id": oid}, {"$set": {"payment_status": new_status}})
+
 @app.post("/api/checkout/confirm")
 @app.get("/api/checkout/confirm")
-def confirm_order(order_id: Optional[str] = None, status: Optional[str] = None):
-    # Support GET with query params and POST JSON
-    from fastapi import Request
-    # If used as POST, read from body via dependency is complex; keep simple
+async def confirm_order(background: BackgroundTasks, order_id: Optional[str] = None, status: Optional[str] = None):
+    # GET (frontend redirect) and POST both take order_id/status as query params
     if order_id is None:
-      # try read from environment? keep as is for GET usage from frontend redirect
-      raise HTTPException(status_code=400, detail="order_id required")
-    order = db["order"].find_one({"_id": __import__("bson").ObjectId(order_id)}) if order_id else None
-    if not order:
+        raise HTTPException(status_code=400, detail="order_id required")
+    try:
+        oid = ObjectId(order_id)
+    except InvalidId:
+        raise HTTPException(status_code=404, detail="Order not found")
+    order = await ORDER_COL.find_one({"_id": oid}, projection={"_id": 1})
+    if order is None:
         raise HTTPException(status_code=404, detail="Order not found")
     new_status = "paid" if status == "paid" else "failed"
-    db["order"].update_one({"_id": __import__("bson").ObjectId(order_id)}, {"$set": {"payment_status": new_status}})
+    # Persist after the response is sent; the redirect only waits on the lookup
+    background.add_task(set_payment_status, oid, new_status)
     return {"order_id": order_id, "payment_status": new_status}
 
-@app.get("/api/orders")
-def list_orders(limit: int = 20):
-    docs = get_documents("order", {}, limit)
-    for d in docs:
-        if "_id" in d:
-            d["id"] = str(d.pop("_id"))
-    return {"items": docs}
+@app.get("/api/orders", response_model=OrderPage)
+async def list_orders(limit: int = 20, cursor: Optional[str] = None):
+    docs = await get_documents("order", page_filter(cursor), limit, sort=NEWEST_FIRST)
+    return json_response(items_json(ORDER_LIST_ADAPTER, OrderOut, docs, next_cursor=next_cursor(docs, limit)))
 
 # ------------- Schema viewer support -------------
 
+# Minimal schema endpoint so external tools can infer collections
+SCHEMA_PAYLOAD = orjson.dumps({
+    "collections": ["user", "product", "blogpost", "consultation", "order"],
+})
+
 @app.get("/schema")
-def get_schema_info():
-    # Minimal schema endpoint so external tools can infer collections
-    return {
-        "collections": ["user", "product", "blogpost", "consultation", "order"],
-    }
+async def get_schema_info():
+    return json_response(SCHEMA_PAYLOAD)
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    # Multiple workers require the app as an import string
+    uvicorn.run("main:app", host="0.0.0.0", port=port, loop="auto", http="httptools", workers=workers)
@@ -13,8 +13,9 @@ Model name is converted to lowercase for the collection name:
 - Order -> "order" collection
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
+from datetime import datetime
 
 # Core schemas
 
@@ -62,6 +63,7 @@ class Consultation(BaseModel):
     time: str  # HH:MM
     notes: Optional[str] = None
     status: str = Field("pending", description="pending | confirmed | completed | cancelled")
+    created_at: Optional[datetime] = Field(None, description="Booking time, stamped on insert")
 
 class OrderItem(BaseModel):
     product_id: str
@@ -83,3 +85,42 @@ class Order(BaseModel):
     customer_address: str
     payment_status: str = Field("pending", description="pending | paid | failed")
     payment_provider: str = Field("mock", description="mock | stripe | razorpay etc")
+    created_at: Optional[datetime] = Field(None, description="Order placement time, stamped on insert")
+
+# Output schemas
+
+class DocumentOut(BaseModel):
+    """Stored document as returned by the API: Mongo's _id exposed as a string id"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+
+class ProductOut(Product, DocumentOut):
+    pass
+
+class BlogPostOut(BlogPost, DocumentOut):
+    pass
+
+class BlogPostSummaryOut(DocumentOut):
+    """Blog listing card: everything except the post body"""
+    title: str
+    slug: str
+    excerpt: Optional[str] = None
+    cover_image: Optional[str] = None
+    author: Optional[str] = None
+
+class ConsultationOut(Consultation, DocumentOut):
+    pass
+
+class ConsultationPage(BaseModel):
+    """One keyset-paginated page of consultations"""
+    items: List[ConsultationOut]
+    next_cursor: Optional[str] = None
+
+class OrderOut(Order, DocumentOut):
+    pass
+
+class OrderPage(BaseModel):
+    """One keyset-paginated page of orders"""
+    items: List[OrderOut]
+    next_cursor: Optional[str] = None